@@ -0,0 +1,93 @@
+# --- _candle_geom.py ---
+
+import logging
+
+import numpy as np
+
+# --- Numba Check ---
+# numba is optional. Without it `njit` is a pass-through decorator so the
+# kernel below still defines cleanly, and candle_geom dispatches to NumPy.
+try:
+    from numba import njit, prange
+
+    _has_numba = True
+    logging.info("numba found.")
+except ImportError:
+    _has_numba = False
+    logging.info("numba not found. Using NumPy candle geometry.")
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+# --- End Numba Check ---
+
+
+# Candle geometry for one color partition. `idx` selects the candles; `top` and
+# `bottom` are the body edge columns for that partition. Fills the wick segment
+# endpoints (4 per candle: high-top, low-bottom) and body rects as x, y, w, h.
+@njit(cache=True, parallel=True, fastmath=True)
+def _candle_geom_jit(idx, t, h, l, top, bottom, w, wick_x, wick_y, body):
+    half = w * 0.5
+    for k in prange(idx.size):
+        i = idx[k]
+        j = 4 * k
+        x = t[i]
+        wick_x[j] = x
+        wick_x[j + 1] = x
+        wick_x[j + 2] = x
+        wick_x[j + 3] = x
+        wick_y[j] = h[i]
+        wick_y[j + 1] = top[i]
+        wick_y[j + 2] = l[i]
+        wick_y[j + 3] = bottom[i]
+        body[k, 0] = x - half
+        body[k, 1] = bottom[i]
+        body[k, 2] = w
+        body[k, 3] = top[i] - bottom[i]
+
+
+def _candle_geom_numpy(idx, t, h, l, top, bottom, w, wick_x, wick_y, body):
+    ti, top_i, bottom_i = t[idx], top[idx], bottom[idx]
+    wick_x.reshape(-1, 4)[:] = ti[:, None]
+    wick_y[0::4] = h[idx]
+    wick_y[1::4] = top_i
+    wick_y[2::4] = l[idx]
+    wick_y[3::4] = bottom_i
+    body[:, 0] = ti - w * 0.5
+    body[:, 1] = bottom_i
+    body[:, 2] = w
+    body[:, 3] = top_i - bottom_i
+
+
+# The un-jitted loop would run per candle in the interpreter, so without numba
+# the vectorized version is used instead.
+candle_geom = _candle_geom_jit if _has_numba else _candle_geom_numpy
+
+
+def warmup():
+    """
+    Compiles the numba kernel (or loads it from the on-disk cache) ahead of
+    the first plot. Argument dtypes match CandlestickItem's buffers exactly
+    so the real call reuses this specialization. No-op without numba.
+    """
+    if not _has_numba:
+        return
+    idx = np.arange(1, dtype=np.intp)
+    t = np.zeros(1, dtype=np.float64)
+    p = np.zeros(1, dtype=np.float32)
+    _candle_geom_jit(
+        idx,
+        t,
+        p,
+        p,
+        p,
+        p,
+        0.6,
+        np.empty(4, dtype=np.float64),
+        np.empty(4, dtype=np.float32),
+        np.empty((1, 4), dtype=np.float64),
+    )
@@ -0,0 +1,361 @@
+# --- data_fetcher.py ---
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time as pytime
+from datetime import datetime, time, timezone
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# --- Parquet Check ---
+# The on-disk cache needs a parquet engine; without one every fetch goes to Yahoo.
+try:
+    import pyarrow  # noqa: F401
+
+    _has_parquet = True
+except ImportError:
+    _has_parquet = False
+    logging.info("pyarrow not found. Fetch cache disabled.")
+# --- End Parquet Check ---
+
+# --- Constants ---
+CACHE_DIR = os.path.join(".cache", "yfinance")
+INTRADAY_TTL_SECONDS = 300  # Recent intraday bars keep changing
+DAILY_TTL_SECONDS = 86400  # Daily/weekly history is stable for a day
+DAILY_WEEKLY_INTERVALS = frozenset({"1d", "5d", "1wk", "1mo", "3mo"})
+YF_MIN_REQUEST_INTERVAL = 1.0  # Seconds between Yahoo calls (~60/minute)
+
+# Shared by every fetch thread so rapid Fetch clicks can't burst past the limit.
+_yf_rate_lock = threading.Lock()
+_yf_last_request = 0.0
+
+
+def _yf_history(ticker, yf_kwargs):
+    """Calls `Ticker.history`, spacing calls at least YF_MIN_REQUEST_INTERVAL apart."""
+    global _yf_last_request
+    with _yf_rate_lock:
+        wait = _yf_last_request + YF_MIN_REQUEST_INTERVAL - pytime.monotonic()
+        if wait > 0:
+            logging.debug(f"Throttling Yahoo request for {wait:.2f}s")
+            pytime.sleep(wait)
+        _yf_last_request = pytime.monotonic()
+    return yf.Ticker(ticker).history(**yf_kwargs)
+
+
+def ttl_for_interval(interval):
+    """Returns the cache lifetime in seconds for data fetched at `interval`."""
+    if interval in DAILY_WEEKLY_INTERVALS:
+        return DAILY_TTL_SECONDS
+    return INTRADAY_TTL_SECONDS
+
+
+class FetchCache:
+    """
+    File-based cache for yfinance `Ticker.history` results.
+
+    Each entry is a parquet file holding the DataFrame (index timezone is kept
+    in the parquet metadata) plus a `.meta.json` sidecar with the time it was
+    written and its TTL. Entries are keyed by ticker and the history kwargs.
+    Without pyarrow, entries are kept in memory for the life of the process.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory = {}  # key -> (timestamp, ttl_seconds, DataFrame)
+
+    @staticmethod
+    def _key(ticker, yf_kwargs):
+        key_src = json.dumps({"ticker": ticker, **yf_kwargs}, sort_keys=True)
+        return hashlib.md5(key_src.encode()).hexdigest()
+
+    def _paths(self, ticker, yf_kwargs):
+        key = self._key(ticker, yf_kwargs)
+        safe_ticker = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        base = os.path.join(self.cache_dir, f"{safe_ticker}_{key}")
+        return f"{base}.parquet", f"{base}.meta.json"
+
+    def _load(self, data_path, meta_path):
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            age = pytime.time() - meta["timestamp"]
+            if age > meta["ttl_seconds"]:
+                logging.debug(f"Cache entry expired ({age:.0f}s old): {data_path}")
+                self._remove(data_path, meta_path)
+                return None
+            return pd.read_parquet(data_path)
+        except Exception as e:
+            logging.warning(f"Failed reading cache entry {data_path}: {e}")
+            self._remove(data_path, meta_path)
+            return None
+
+    @staticmethod
+    def _remove(*paths):
+        # Keyed entries (e.g. each custom date range) are rarely rewritten, so
+        # stale or unreadable ones are deleted rather than left to pile up.
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Failed removing cache file {path}: {e}")
+
+    def _store(self, data, data_path, meta_path, ttl):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data.to_parquet(data_path)
+            with open(meta_path, "w") as f:
+                json.dump({"timestamp": pytime.time(), "ttl_seconds": ttl}, f)
+        except Exception as e:
+            logging.warning(f"Failed writing cache entry {data_path}: {e}")
+
+    def get_or_fetch(self, ticker, yf_kwargs, ttl):
+        """
+        Returns `yf.Ticker(ticker).history(**yf_kwargs)`, served from disk when
+        a fresh cache entry exists.
+
+        Args:
+            ticker (str): Ticker symbol.
+            yf_kwargs (dict): Keyword arguments for `Ticker.history`.
+            ttl (int): Lifetime in seconds for a newly written entry.
+
+        Returns:
+            pd.DataFrame: The history DataFrame (may be empty).
+        """
+        if not _has_parquet:
+            return self._get_or_fetch_memory(ticker, yf_kwargs, ttl)
+        data_path, meta_path = self._paths(ticker, yf_kwargs)
+        cached = self._load(data_path, meta_path)
+        if cached is not None:
+            logging.info(f"Cache hit for {ticker} {yf_kwargs}.")
+            return cached
+        logging.debug(f"Cache miss for {ticker} {yf_kwargs}. Fetching...")
+        data = _yf_history(ticker, yf_kwargs)
+        if not data.empty:
+            self._store(data, data_path, meta_path, ttl)
+        return data
+
+    def _get_or_fetch_memory(self, ticker, yf_kwargs, ttl):
+        key = self._key(ticker, yf_kwargs)
+        entry = self._memory.get(key)
+        if entry is not None and pytime.time() - entry[0] <= entry[1]:
+            logging.info(f"Memory cache hit for {ticker} {yf_kwargs}.")
+            return entry[2].copy()
+        data = _yf_history(ticker, yf_kwargs)
+        if not data.empty:
+            self._memory[key] = (pytime.time(), ttl, data.copy())
+        return data
+
+
+def _ensure_tz(index, preferred_tz):
+    """
+    Returns `(index, tz)` with the index timezone-aware.
+
+    An aware index is returned untouched. A naive one is localized to
+    `preferred_tz` in a single pass (DST gaps shift forward, ambiguous wall
+    times become NaT), falling back to UTC if that fails.
+    """
+    if index.tz is not None:
+        return index, index.tz
+    try:
+        return (
+            index.tz_localize(
+                preferred_tz, nonexistent="shift_forward", ambiguous="NaT"
+            ),
+            preferred_tz,
+        )
+    except Exception as e:
+        logging.warning(f"Localizing to {preferred_tz} failed: {e}. Using UTC.")
+        return index.tz_localize(timezone.utc), timezone.utc
+
+
+class _FetchDataError(Exception):
+    """Raised inside FetchWorker for data problems that are reported to the user."""
+
+
+class FetchWorker(QObject):
+    """
+    Worker object to fetch and clean chart data in a separate thread.
+    Communicates with the main GUI thread via signals.
+    """
+
+    # --- Signals ---
+    # Signal with the prepared chart data
+    # Args: dict with keys t, o, h, l, c (np.ndarray), v (float32 np.ndarray),
+    #       tz, df (pd.DataFrame)
+    finished = pyqtSignal(dict)
+
+    # Signal when the fetch failed or produced no usable data
+    # Args: message for the user
+    error = pyqtSignal(str)
+
+    def __init__(self, ticker, period, yf_kwargs, cache, local_tz, filter_date=None):
+        """
+        Args:
+            ticker (str): Ticker symbol.
+            period (str): Period label, used in messages only.
+            yf_kwargs (dict): Keyword arguments for `Ticker.history`.
+            cache (FetchCache): Cache used to serve/store the history call.
+            local_tz (tzinfo): Zone used to localize a naive index.
+            filter_date (datetime.date, optional): Keep only bars on this date.
+        """
+        super().__init__()
+        self.ticker = ticker
+        self.period = period
+        self.yf_kwargs = yf_kwargs
+        self.cache = cache
+        self.local_tz = local_tz
+        self.filter_date = filter_date
+
+    def run(self):
+        """Main fetch logic executed by the thread."""
+        try:
+            result = self._fetch()
+        except _FetchDataError as e:
+            self.error.emit(str(e))
+        except Exception as e:
+            logging.error(f"Error during fetch: {e}", exc_info=True)
+            self.error.emit(f"Fetch Error:\n{e}\n\nCheck logs.")
+        else:
+            self.finished.emit(result)
+
+    def _fetch(self):
+        ticker = self.ticker
+        period = self.period
+        interval = self.yf_kwargs["interval"]
+        logging.debug(
+            f"Calling yfinance Ticker().history() with args: {self.yf_kwargs}"
+        )
+        stock_data_full = self.cache.get_or_fetch(
+            ticker, self.yf_kwargs, ttl=ttl_for_interval(interval)
+        )
+        logging.info(
+            f"yfinance fetch complete. Raw data shape: {stock_data_full.shape}"
+        )
+        if stock_data_full.empty:
+            logging.warning("yfinance returned empty DataFrame.")
+            raise _FetchDataError(
+                f"No data from yfinance for {ticker} ({interval} / {period})."
+            )
+
+        stock_data = stock_data_full
+        data_tz = None
+        if self.filter_date is not None:
+            logging.debug("Filtering fetched data to selected custom date...")
+            filter_start_dt = datetime.combine(self.filter_date, time.min)
+            filter_end_dt = datetime.combine(self.filter_date, time.max)
+            if not isinstance(stock_data_full.index, pd.DatetimeIndex):
+                logging.error("Index not DatetimeIndex.")
+                raise _FetchDataError(f"Unexpected data index for {ticker}.")
+            index, data_tz = _ensure_tz(stock_data_full.index, self.local_tz)
+            logging.debug(f"Data TZ: {data_tz}")
+            if index is not stock_data_full.index:
+                stock_data_full.index = index
+                if index.hasnans:
+                    # Ambiguous DST wall times can't be placed; drop them.
+                    stock_data_full = stock_data_full[~index.isna()]
+            filter_start_dt_aware = pd.Timestamp(filter_start_dt).tz_localize(
+                data_tz, nonexistent="shift_forward", ambiguous=True
+            )
+            filter_end_dt_aware = pd.Timestamp(filter_end_dt).tz_localize(
+                data_tz, nonexistent="shift_backward", ambiguous=False
+            )
+            logging.debug(
+                f"Filtering with range: {filter_start_dt_aware} to {filter_end_dt_aware}"
+            )
+            index = stock_data_full.index
+            if index.is_monotonic_increasing:
+                # Binary search on the sorted index; iloc gives a slice view.
+                start_i = index.searchsorted(filter_start_dt_aware, side="left")
+                end_i = index.searchsorted(filter_end_dt_aware, side="right")
+                stock_data = stock_data_full.iloc[start_i:end_i]
+            else:
+                stock_data = stock_data_full[
+                    (index >= filter_start_dt_aware) & (index <= filter_end_dt_aware)
+                ]
+            logging.info(f"Data shape after custom date filtering: {stock_data.shape}")
+            if stock_data.empty:
+                logging.warning("Data empty after custom date filtering.")
+                raise _FetchDataError(
+                    f"No data found for {ticker} on {self.filter_date:%Y-%m-%d} after filtering."
+                )
+        else:
+            if (
+                isinstance(stock_data.index, pd.DatetimeIndex)
+                and hasattr(stock_data.index, "tz")
+                and stock_data.index.tz is not None
+            ):
+                data_tz = stock_data.index.tz
+                logging.debug(f"Data timezone for period fetch: {data_tz}")
+            elif isinstance(stock_data.index, pd.DatetimeIndex):
+                logging.warning("Data index is naive for period fetch.")
+                data_tz = self.local_tz
+            else:
+                logging.error("Index type is not DatetimeIndex for period fetch.")
+                data_tz = None
+
+        logging.debug("Starting data cleaning...")
+        stock_data.columns = [col.capitalize() for col in stock_data.columns]
+        logging.debug(f"Columns capitalized: {stock_data.columns.tolist()}")
+        required_cols = ["Open", "High", "Low", "Close", "Volume"]
+        if not all(col in stock_data.columns for col in required_cols):
+            missing = [c for c in required_cols if c not in stock_data.columns]
+            logging.error(f"Missing required columns: {missing}")
+            raise ValueError(f"Missing required columns: {missing}")
+        # One mask pass over the five columns replaces a per-column dropna;
+        # the frame is only re-indexed when a row actually has to go.
+        ohlcv = stock_data[required_cols].to_numpy(dtype=np.float64, copy=False)
+        valid = np.isfinite(ohlcv).all(axis=1)
+        initial_rows = len(stock_data)
+        rows_after_na = int(np.count_nonzero(valid))
+        logging.debug(
+            f"Rows before/after NaN mask: {initial_rows}/{rows_after_na}. Dropped: {initial_rows - rows_after_na}"
+        )
+        if rows_after_na == 0:
+            logging.warning("Data empty after NaN mask.")
+            raise _FetchDataError(
+                f"Data for {ticker} ({interval}/{period}) contained only NaNs."
+            )
+        if rows_after_na < initial_rows:
+            ohlcv = ohlcv[valid]
+            stock_data = stock_data[valid]
+
+        logging.debug("Converting final index to UTC timestamps...")
+        time_stamps = None
+        if isinstance(stock_data.index, pd.DatetimeIndex):
+            # asi8 of an aware index is already UTC epoch time, and a naive
+            # index is taken as UTC, so no tz_convert/tz_localize pass is
+            # needed; as_unit is a no-op for the usual ns index.
+            time_stamps = stock_data.index.as_unit("ns").asi8 // 1_000_000_000
+        else:
+            logging.error("Final index not DatetimeIndex!")
+        if time_stamps is None or len(time_stamps) == 0:
+            logging.error("No valid timestamps generated.")
+            raise _FetchDataError("Error processing timestamps.")
+        logging.debug(f"Timestamp conversion OK. Count: {len(time_stamps)}.")
+
+        # One transpose-copy gives each field its own contiguous row, so the
+        # plot items take the columns as-is instead of copying strided views.
+        o, h, l, c, v = np.ascontiguousarray(ohlcv.T)
+        return {
+            "t": time_stamps,
+            "o": o,
+            "h": h,
+            "l": l,
+            "c": c,
+            # Volume only ever feeds bar heights and the y-range, where float32
+            # is ample; the finite mask above already dropped NaN rows.
+            "v": v.astype(np.float32),
+            "tz": data_tz,
+            "df": stock_data,
+        }
@@ -1,14 +1,19 @@
 # --- playback_generator.py ---
 
+import logging
 import os
+import queue
+import shutil
+import subprocess
+import sys
 import tempfile
 import time
-import traceback
 
 import imageio # For creating GIF/Video
 import numpy as np
 import pandas as pd
-from PyQt6.QtCore import QObject, pyqtSignal, QThread # For threading and signals
+from PIL import Image # Shared-palette GIF encoding
+from PyQt6.QtCore import QObject, pyqtSignal # For signals
 import threading # For cancellation flag
 
 # --- Constants ---
@@ -22,6 +27,136 @@ PLAYBACK_SPEEDS = {
     "Very Fast": {"step_bars": 10, "frame_duration_ms": 50},# Add 10 bars per frame, 0.05s per frame
 }
 DEFAULT_PLAYBACK_SPEED = "Normal"
+FRAME_TIMEOUT_SEC = 5.0 # How long to wait for the GUI to render one frame
+# Channel order of Qt's native 32-bit pixels (0xAARRGGBB words) -> RGBA
+_NATIVE_TO_RGBA = [2, 1, 0, 3] if sys.byteorder == "little" else [1, 2, 3, 0]
+# The same layout as an ffmpeg rawvideo pixel format / Pillow raw RGB mode
+_NATIVE_PIX_FMT = "bgra" if sys.byteorder == "little" else "argb"
+_NATIVE_PIL_RAW_MODE = "BGRX" if sys.byteorder == "little" else "XRGB"
+
+
+def _find_ffmpeg():
+    """Returns an ffmpeg executable: the one on PATH, else imageio-ffmpeg's bundled binary, else None."""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception: # Not installed or no binary for this platform
+        return None
+
+
+class _GifPaletteWriter:
+    """
+    Minimal imageio-style GIF writer that maps every frame (Qt's native
+    32-bit layout) onto one shared 256-colour palette, like gifski does.
+    Frames are kept as 8-bit indexed images, so Pillow skips per-frame
+    palette selection and the palette doesn't jump between frames.
+    The file is written on close(), so memory grows by width*height bytes
+    per frame until then. Streaming them wouldn't help: Pillow's GIF
+    encoder collects every frame itself before writing any.
+    """
+
+    def __init__(self, output_filename, duration_ms, palette_frame=None):
+        self.output_filename = output_filename
+        self.duration_ms = duration_ms
+        self._palette = None
+        self._frames = []
+        if palette_frame is not None:
+            self._palette = self._to_rgb(palette_frame).quantize(
+                colors=256, method=Image.Quantize.FASTOCTREE)
+
+    @staticmethod
+    def _to_rgb(frame):
+        height, width = frame.shape[:2]
+        return Image.frombuffer("RGB", (width, height), frame, "raw", _NATIVE_PIL_RAW_MODE, 0, 1)
+
+    def append_data(self, frame):
+        image = self._to_rgb(frame)
+        if self._palette is None: # No sample frame; fall back to the first one
+            self._palette = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        self._frames.append(image.quantize(palette=self._palette, dither=Image.Dither.NONE))
+
+    def close(self):
+        if not self._frames:
+            return
+        first, *rest = self._frames
+        self._frames = []
+        # optimize=False: every frame already uses the one palette, so the
+        # per-frame palette compaction would only cost time (and bytes)
+        first.save(self.output_filename, save_all=True, append_images=rest,
+                   duration=self.duration_ms, loop=0, optimize=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._frames = [] # Nothing written yet; just drop the frames
+
+
+class _FfmpegPipeWriter:
+    """
+    Minimal imageio-style video writer that pipes frames in Qt's native
+    32-bit layout straight into an ffmpeg (libx264) subprocess, so encoding
+    runs in its own process alongside rendering. ffmpeg is started on the
+    first frame, once the frame size is known.
+    """
+
+    def __init__(self, ffmpeg_exe, output_filename, fps):
+        self.ffmpeg_exe = ffmpeg_exe
+        self.output_filename = output_filename
+        self.fps = fps
+        self._proc = None
+        self._log = None # ffmpeg's stderr; a file so a full pipe can't stall it
+
+    def append_data(self, frame):
+        if self._proc is None:
+            height, width = frame.shape[:2]
+            self._log = tempfile.TemporaryFile()
+            self._proc = subprocess.Popen(
+                [self.ffmpeg_exe, '-y', '-loglevel', 'error',
+                 '-f', 'rawvideo', '-pix_fmt', _NATIVE_PIX_FMT,
+                 '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                 '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', # yuv420p needs even sizes
+                 '-c:v', 'libx264', '-crf', '10', # Same as imageio's quality=8
+                 '-pix_fmt', 'yuv420p', self.output_filename],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log)
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.close() # Raises with ffmpeg's own error message
+
+    def close(self):
+        if self._proc is None:
+            return
+        proc, self._proc = self._proc, None
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = proc.wait()
+        self._log.seek(0)
+        message = self._log.read().decode(errors='replace').strip()
+        self._log.close()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {returncode}: {message}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._proc is not None:
+            # Output is discarded anyway; don't mask the original exception
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+            self._log.close()
 
 class PlaybackGeneratorWorker(QObject):
     """
@@ -29,9 +164,10 @@ class PlaybackGeneratorWorker(QObject):
     Communicates with the main GUI thread via signals.
     """
     # --- Signals ---
-    # Signal to request the main thread updates its view and exports a frame
-    # Args: frame_number, start_timestamp, end_timestamp, temp_frame_path
-    request_export_frame = pyqtSignal(int, float, float, str)
+    # Signal to request the main thread updates its view and renders a frame
+    # The rendered frame comes back through submit_frame()
+    # Args: frame_number, start_timestamp, end_timestamp
+    request_export_frame = pyqtSignal(int, float, float)
 
     # Signal for progress update
     # Args: percentage (0-100)
@@ -41,14 +177,18 @@ class PlaybackGeneratorWorker(QObject):
     # Args: message (success file path or error description)
     finished = pyqtSignal(str)
 
-    def __init__(self, stock_data_df, output_filename, speed_setting, interval_seconds, cancel_event):
+    def __init__(self, stock_data_df, output_filename, speed_setting, interval_seconds, cancel_event, timestamps=None):
         """
         Args:
-            stock_data_df (pd.DataFrame): DataFrame containing the full chart data.
+            stock_data_df (pd.DataFrame): DataFrame containing the full chart data,
+                                          indexed by a tz-aware DatetimeIndex or a
+                                          naive one holding UTC times.
             output_filename (str): Path where the final GIF/video will be saved.
             speed_setting (str): Key from PLAYBACK_SPEEDS (e.g., "Normal").
             interval_seconds (int): The approximate duration of one bar in seconds.
             cancel_event (threading.Event): Event object to signal cancellation.
+            timestamps (np.ndarray, optional): UTC seconds for each row of stock_data_df,
+                                               derived from its index when omitted.
         """
         super().__init__()
         self.stock_data_df = stock_data_df
@@ -56,15 +196,49 @@ class PlaybackGeneratorWorker(QObject):
         self.speed_setting = speed_setting if speed_setting in PLAYBACK_SPEEDS else DEFAULT_PLAYBACK_SPEED
         self.interval_seconds = max(interval_seconds, 1) # Avoid division by zero
         self.cancel_event = cancel_event
-        self._frame_paths = [] # List to store paths of generated frames
+        self.timestamps = timestamps
+        self._frames = queue.Queue() # (frame_number, BGRA ndarray) handed over by the GUI thread
         self._is_running = True # Internal flag, less critical now with cancel_event
 
+    def submit_frame(self, frame_number, image):
+        """
+        Hands a rendered frame to the worker. Called from the GUI thread while
+        run() is busy, so frames travel through a thread-safe queue instead of
+        a queued slot (this thread's event loop is not running).
+
+        Args:
+            frame_number (int): Number from the matching request_export_frame.
+            image (np.ndarray): (height, width, 4) uint8 frame in Qt's native
+                                ARGB32 byte order (BGRA on little-endian).
+        """
+        self._frames.put((frame_number, image))
+
+    def _wait_for_frame(self, frame_number, timeout):
+        """
+        Blocks until the GUI submits `frame_number` and returns its image.
+        Returns None on timeout or when stop() wakes the worker up.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                item = self._frames.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if item is None: # Wake-up from stop()
+                return None
+            submitted_number, image = item
+            if submitted_number == frame_number:
+                return image
+            # Otherwise a late frame that was already skipped; drop it
+
     def run(self):
         """Main generation logic executed by the thread."""
-        print("Playback generation started...")
+        logging.info("Playback generation started...")
         self._is_running = True
-        self._frame_paths = []
-        temp_dir = None
+        output_complete = None # False once the writer has created the output file
 
         try:
             if self.stock_data_df is None or self.stock_data_df.empty:
@@ -81,14 +255,12 @@ class PlaybackGeneratorWorker(QObject):
             if not isinstance(self.stock_data_df.index, pd.DatetimeIndex):
                  raise TypeError("Stock data index must be DatetimeIndex for playback.")
 
-            # Convert index to UTC timestamps (seconds) for calculations
-            try:
-                if hasattr(self.stock_data_df.index, 'tz') and self.stock_data_df.index.tz is not None:
-                    timestamps = self.stock_data_df.index.tz_convert('UTC').astype(np.int64) // 10**9
-                else: # Assume or localize to UTC
-                    timestamps = self.stock_data_df.index.tz_localize('UTC', ambiguous='infer').astype(np.int64) // 10**9
-            except Exception as ts_err:
-                raise ValueError(f"Failed to get timestamps from data index: {ts_err}")
+            # UTC timestamps (seconds) for calculations; the chart passes the
+            # array it already holds. A tz-aware index stores UTC internally and
+            # a naive one is taken as UTC, so no tz conversion is needed.
+            timestamps = self.timestamps
+            if timestamps is None:
+                timestamps = self.stock_data_df.index.as_unit("ns").asi8 // 1_000_000_000
 
 
             full_start_ts = timestamps[0]
@@ -98,113 +270,126 @@ class PlaybackGeneratorWorker(QObject):
             # Determine the number of initial bars to show (e.g., first 10 or 5%?)
             initial_bars = max(10, total_bars // 20) # Show at least 10 bars initially
 
-            # Create a temporary directory for frames
-            temp_dir = tempfile.mkdtemp(prefix="chart_playback_")
-            print(f"Using temporary directory for frames: {temp_dir}")
-
-            # --- Frame Generation Loop ---
-            num_frames = (total_bars - initial_bars + step_bars -1) // step_bars # Calculate total frames needed
-            frame_count = 0
-
-            for i in range(initial_bars, total_bars + step_bars, step_bars):
-                if self.cancel_event.is_set():
-                    print("Playback generation cancelled.")
-                    self.finished.emit("Generation cancelled.")
-                    self._is_running = False
-                    break # Exit the loop
-
-                current_bar_index = min(i, total_bars - 1) # Clamp to last bar index
-                frame_end_ts = timestamps[current_bar_index]
-
-                # Define path for this frame
-                frame_filename = os.path.join(temp_dir, f"frame_{frame_count:05d}.png")
-                self._frame_paths.append(frame_filename)
-
-                # Emit signal to main thread to update view and export this frame
-                # The main thread will handle plot updates and exporting
-                self.request_export_frame.emit(frame_count, full_start_ts, frame_end_ts, frame_filename)
-
-                # --- Wait briefly ---
-                # This allows the main thread time to process the request.
-                # A more robust solution might use QWaitCondition, but time.sleep is simpler here.
-                # Adjust sleep time if needed, but keep it short.
-                QThread.msleep(20) # Sleep for 20 milliseconds
-
-                # Update progress
-                progress_percent = int((frame_count / max(1, num_frames)) * 100)
-                self.progress.emit(progress_percent)
-                frame_count += 1
-
-
-            if not self._is_running: # If cancelled during loop
-                 raise InterruptedError("Playback cancelled")
-
-
-            # --- Combine Frames ---
-            if not self._frame_paths:
+            # Last bar shown in each frame, clamped to the final bar, looked up once
+            frame_bar_indices = np.minimum(
+                np.arange(initial_bars, total_bars + step_bars, step_bars), total_bars - 1)
+            frame_end_timestamps = np.asarray(timestamps)[frame_bar_indices].tolist()
+            num_frames = len(frame_end_timestamps)
+            if num_frames == 0:
                 raise ValueError("No frames were generated.")
 
-            self.progress.emit(100) # Ensure progress reaches 100%
-            print(f"Combining {len(self._frame_paths)} frames into {self.output_filename}...")
-
-            # Use imageio to create the GIF/video
-            # duration is per frame in seconds
+            # --- Writer Setup ---
+            # duration is per frame in milliseconds
             # loop=0 means loop forever for GIF
             # Use fps for video formats
             file_ext = os.path.splitext(self.output_filename)[1].lower()
             kwargs = {}
             if file_ext == '.gif':
-                kwargs['duration'] = frame_duration_sec
+                kwargs['duration'] = speed_params["frame_duration_ms"]
                 kwargs['loop'] = 0
             else: # Assume video format
-                # Calculate FPS: More bars per frame or shorter duration = higher FPS
-                # fps = 1.0 / frame_duration_sec # Basic FPS
-                # Consider step size: if step=5, maybe fps should be higher?
-                fps = max(1, int(step_bars / frame_duration_sec / step_bars * 10)) # Heuristic adjustment
+                # One frame per frame_duration_sec, same pacing as the GIF; the
+                # speed setting's step_bars already sets how far each frame moves.
+                fps = max(1, round(1.0 / frame_duration_sec))
+                logging.info(f"Video: {fps} fps effective, {step_bars} bars per frame")
                 kwargs['fps'] = fps
                 kwargs['quality'] = 8 # Decent quality (0-10), affects file size
 
-            print(f"Using imageio kwargs: {kwargs}")
-
-            with imageio.get_writer(self.output_filename, mode='I', **kwargs) as writer:
-                for frame_path in self._frame_paths:
-                    if self.cancel_event.is_set(): # Check again before reading/writing
-                         raise InterruptedError("Playback cancelled during saving")
-                    try:
-                        image = imageio.imread(frame_path)
-                        writer.append_data(image)
-                    except FileNotFoundError:
-                         print(f"Warning: Frame not found: {frame_path}. Skipping.")
-                    except Exception as img_err:
-                         print(f"Warning: Error reading/writing frame {frame_path}: {img_err}. Skipping.")
-
-
+            # GIFs get a shared palette; videos go straight to ffmpeg when one
+            # is available, otherwise through imageio.
+            ffmpeg_exe = _find_ffmpeg() if file_ext != '.gif' else None
+            takes_native_frames = True
+            if file_ext == '.gif':
+                # The fully drawn chart holds every colour any frame will use
+                self.request_export_frame.emit(-1, full_start_ts, frame_end_timestamps[-1])
+                palette_frame = self._wait_for_frame(-1, FRAME_TIMEOUT_SEC)
+                logging.info(f"Writing GIF with a shared palette, {kwargs['duration']} ms per frame")
+                writer_context = _GifPaletteWriter(self.output_filename, kwargs['duration'], palette_frame)
+            elif ffmpeg_exe:
+                logging.info(f"Piping frames to {ffmpeg_exe} at {kwargs['fps']} fps")
+                writer_context = _FfmpegPipeWriter(ffmpeg_exe, self.output_filename, kwargs['fps'])
+            else:
+                logging.debug(f"Using imageio kwargs: {kwargs}")
+                writer_context = imageio.get_writer(self.output_filename, mode='I', **kwargs)
+                takes_native_frames = False
+
+            # Frames are rendered in memory by the GUI thread and appended as
+            # they arrive; nothing is staged on disk.
+            with writer_context as writer:
+                output_complete = False
+                if takes_native_frames:
+                    append_frame = writer.append_data # Takes Qt's layout as-is
+                else:
+                    # Channel swap happens here, off the GUI thread
+                    append_frame = lambda frame: writer.append_data(frame[..., _NATIVE_TO_RGBA])
+                # --- Frame Generation Loop ---
+                last_image = None # Received but not yet written
+                last_percent = -1
+                # Bound once; these run every frame
+                cancel_is_set = self.cancel_event.is_set
+                request_frame = self.request_export_frame.emit
+                wait_for_frame = self._wait_for_frame
+                emit_progress = self.progress.emit
+
+                for frame_count, frame_end_ts in enumerate(frame_end_timestamps):
+                    if cancel_is_set():
+                        logging.info("Playback generation cancelled.")
+                        self.finished.emit("Generation cancelled.")
+                        self._is_running = False
+                        break # Exit the loop
+
+                    # Emit signal to main thread to update view and render this frame
+                    # The main thread will handle plot updates and rendering
+                    request_frame(frame_count, full_start_ts, frame_end_ts)
+                    # Encode the previous frame while the GUI renders this one
+                    if last_image is not None:
+                        append_frame(last_image)
+
+                    # --- Wait for the frame ---
+                    # The next request is only sent once this frame is back, so the
+                    # GUI never has more than one frame queued and none is stale.
+                    last_image = wait_for_frame(frame_count, FRAME_TIMEOUT_SEC)
+                    if last_image is None and not cancel_is_set():
+                        logging.warning(f"Frame {frame_count} never arrived. Skipping.")
+
+                    # Update progress; only on change, as each emit queues a GUI event
+                    progress_percent = int((frame_count / num_frames) * 100)
+                    if progress_percent != last_percent:
+                        last_percent = progress_percent
+                        emit_progress(progress_percent)
+
+
+                if not self._is_running: # If cancelled during loop
+                     raise InterruptedError("Playback cancelled")
+
+                if last_image is not None:
+                    append_frame(last_image)
+
+                self.progress.emit(100) # Ensure progress reaches 100%
+
+            output_complete = True
             self.finished.emit(f"Playback saved successfully:\n{self.output_filename}")
-            print("Playback generation finished successfully.")
+            logging.info("Playback generation finished successfully.")
 
         except InterruptedError:
              # Already handled cancellation message emission inside loop/saving
              pass
         except Exception as e:
-            print(f"ERROR during playback generation: {e}")
-            traceback.print_exc() # Print full traceback for debugging
+            logging.error(f"Error during playback generation: {e}", exc_info=True)
             self.finished.emit(f"Error during playback generation: {e}")
         finally:
             # --- Cleanup ---
-            if temp_dir and os.path.exists(temp_dir):
-                print(f"Cleaning up temporary directory: {temp_dir}")
+            if output_complete is False: # Don't leave a truncated GIF/video behind
                 try:
-                    # Remove individual frames first
-                    for frame_path in self._frame_paths:
-                        if os.path.exists(frame_path):
-                            os.remove(frame_path)
-                    # Remove the directory itself
-                    os.rmdir(temp_dir)
-                except Exception as cleanup_err:
-                    print(f"Warning: Failed to fully clean up temp directory {temp_dir}: {cleanup_err}")
+                    os.remove(self.output_filename)
+                except FileNotFoundError: # Writer never got to create it
+                    pass
+                except OSError as cleanup_err:
+                    logging.warning(f"Failed to remove partial output {self.output_filename}: {cleanup_err}")
             self._is_running = False
 
     def stop(self):
         """Method to signal cancellation via the event."""
-        print("Attempting to stop playback generation...")
-        self.cancel_event.set() # Signal the loop/saving process to stop
\ No newline at end of file
+        logging.info("Attempting to stop playback generation...")
+        self.cancel_event.set() # Signal the loop/saving process to stop
+        self._frames.put(None) # Wake run() if it is waiting on a frame
\ No newline at end of file
@@ -2,7 +2,6 @@
 
 import pandas as pd
 import numpy as np
-import pytz  # Need pytz for timezone conversion here too
 
 # --- Scipy Check ---
 # Check for scipy presence, as it's crucial for this module
@@ -19,37 +18,48 @@ except ImportError:
 # --- End Scipy Check ---
 
 
-def _find_swing_points(data_series, distance=5, prominence=None):
+def _find_swing_points(values, distance=5, prominence=None, mode="peaks"):
     """
-    Internal helper finds peaks (highs) or troughs (lows) in a data series.
+    Internal helper finds peaks (highs) or troughs (lows) in price data.
 
     Args:
-        data_series (pd.Series): Price data (e.g., 'High' for peaks, -'Low' for troughs).
+        values (np.ndarray): Price data (e.g., 'High' for peaks, 'Low' for troughs).
         distance (int): Minimum number of samples between peaks.
         prominence (float, optional): Required prominence of peaks.
+        mode (str): 'peaks' for maxima or 'troughs' for minima.
 
     Returns:
-        np.array: Indices of the peaks/troughs in the data_series.
+        np.array: Indices of the peaks/troughs in `values`.
                  Returns empty array if scipy is not available.
     """
     if not _has_scipy:
         return np.array([], dtype=int)
 
-    if data_series is None or data_series.empty:
+    if values is None or len(values) == 0:
         return np.array([], dtype=int)
 
-    # find_peaks finds maxima. To find minima (troughs), invert the series.
+    # find_peaks finds maxima. To find minima (troughs), negate the raw array.
+    if mode == "troughs":
+        values = np.negative(values)
     try:
-        peaks_indices, _ = find_peaks(
-            data_series.values, distance=distance, prominence=prominence
-        )
+        peaks_indices, _ = find_peaks(values, distance=distance, prominence=prominence)
         return peaks_indices
     except Exception as e:
         print(f"Error in find_peaks: {e}")
         return np.array([], dtype=int)
 
 
-def _generate_trend_line_segments(swing_indices, data, line_type="up"):
+def _index_to_utc_seconds(index):
+    """
+    Whole UTC seconds for a DatetimeIndex. Tz-aware indexes store UTC
+    internally and naive ones are taken as UTC, so no tz conversion is needed.
+    """
+    return index.as_unit("ns").asi8 // 1_000_000_000
+
+
+def _generate_trend_line_segments(
+    swing_indices, data, line_type="up", timestamps=None, prices=None
+):
     """
     Internal helper generates candidate trend lines by connecting consecutive swing points.
 
@@ -57,6 +67,10 @@ def _generate_trend_line_segments(swing_indices, data, line_type="up"):
         swing_indices (np.array): Indices of swing highs or lows.
         data (pd.DataFrame): The full stock data DataFrame with a DatetimeIndex.
         line_type (str): 'up' (connect lows) or 'down' (connect highs).
+        timestamps (np.ndarray, optional): UTC seconds for each row of `data`;
+                                           derived from the index when omitted.
+        prices (np.ndarray, optional): The 'Low' (up) or 'High' (down) column as
+                                       an array; read from `data` when omitted.
 
     Returns:
         list: List of dictionaries, each representing a trend line segment.
@@ -78,85 +92,58 @@ def _generate_trend_line_segments(swing_indices, data, line_type="up"):
         print(f"Error: Column '{price_col}' not found in DataFrame.")
         return lines
 
-    # Get UTC timestamps (seconds since epoch) for consistency
-    try:
-        if hasattr(data.index, "tz") and data.index.tz is not None:
-            timestamps = data.index.tz_convert(pytz.utc).astype(np.int64) // 10**9
-        else:
-            # Assume naive index is UTC or localize
-            try:
-                timestamps = data.index.tz_localize("UTC").astype(np.int64) // 10**9
-            except TypeError:  # Already localized or other issue
-                timestamps = (
-                    data.index.astype(np.int64) // 10**9
-                )  # Direct conversion (less safe)
-    except Exception as ts_err:
-        print(f"Error converting index to timestamps in trend analyzer: {ts_err}")
-        return lines
+    # UTC timestamps (seconds since epoch) for consistency
+    if timestamps is None:
+        timestamps = _index_to_utc_seconds(data.index)
 
-    for i in range(len(swing_indices) - 1):
-        idx1 = swing_indices[i]
-        idx2 = swing_indices[i + 1]
-
-        # Basic index bounds check
-        if idx1 >= len(data) or idx2 >= len(data):
-            print(
-                f"Warning: Swing index out of bounds ({idx1}, {idx2} vs len {len(data)}). Skipping."
-            )
-            continue
-
-        # Get timestamps and prices for the two points
-        try:
-            ts1 = timestamps[idx1]
-            ts2 = timestamps[idx2]
-            p1 = data[price_col].iloc[idx1]
-            p2 = data[price_col].iloc[idx2]
-        except IndexError:
-            print(
-                f"Warning: IndexError accessing data at swing indices ({idx1}, {idx2}). Skipping."
-            )
-            continue
-        except Exception as e:
-            print(f"Warning: Error accessing data for swing points: {e}. Skipping.")
-            continue
-
-        # Basic validation: Check slope direction
-        if ts1 >= ts2:
-            continue  # Time should advance
-
-        # Avoid division by zero if timestamps are identical (shouldn't happen with distance > 0)
-        time_delta = ts2 - ts1
-        if time_delta == 0:
-            continue
-
-        slope = (p2 - p1) / time_delta
-
-        valid = False
-        if line_type == "up" and p2 >= p1:  # Uptrend: Higher or equal low
-            valid = True
-        elif line_type == "down" and p2 <= p1:  # Downtrend: Lower or equal high
-            valid = True
-
-        # --- Add More Filtering Here Later ---
-        # - Minimum length (time or points)
-        # - Check if price crosses the line significantly between points 1 and 2
-        # - Minimum number of points (requires more complex logic than just segments)
-        # --------------------------------
-
-        if valid:
-            lines.append(
-                {
-                    "type": line_type,
-                    "start_ts": ts1,
-                    "start_p": p1,
-                    "end_ts": ts2,
-                    "end_p": p2,
-                }
-            )
+    # All consecutive swing pairs at once, as plain ndarrays.
+    swing_indices = np.asarray(swing_indices)
+    in_bounds = swing_indices < len(data)
+    if not in_bounds.all():
+        print(
+            f"Warning: {np.count_nonzero(~in_bounds)} swing indices out of bounds (len {len(data)}). Skipping."
+        )
+        swing_indices = swing_indices[in_bounds]
+    if prices is None:
+        prices = data[price_col].to_numpy()
+    times = np.asarray(timestamps)
+    idx1 = swing_indices[:-1]
+    idx2 = swing_indices[1:]
+    p1 = prices[idx1]
+    p2 = prices[idx2]
+    ts1 = times[idx1]
+    ts2 = times[idx2]
+
+    # Basic validation: time must advance, and the slope direction must match
+    # (uptrend: higher or equal low; downtrend: lower or equal high).
+    valid = ts2 > ts1
+    valid &= (p2 >= p1) if line_type == "up" else (p2 <= p1)
+
+    # --- Add More Filtering Here Later ---
+    # - Minimum length (time or points)
+    # - Check if price crosses the line significantly between points 1 and 2
+    # - Minimum number of points (requires more complex logic than just segments)
+    # --------------------------------
+
+    lines = [
+        {
+            "type": line_type,
+            "start_ts": start_ts,
+            "start_p": start_p,
+            "end_ts": end_ts,
+            "end_p": end_p,
+        }
+        for start_ts, start_p, end_ts, end_p in zip(
+            ts1[valid].tolist(),
+            p1[valid].tolist(),
+            ts2[valid].tolist(),
+            p2[valid].tolist(),
+        )
+    ]
     return lines
 
 
-def find_trend_lines(data, distance=5, prominence=None):
+def find_trend_lines(data, distance=5, prominence=None, timestamps=None):
     """
     Finds potential uptrend and downtrend line segments in the provided stock data.
 
@@ -166,6 +153,9 @@ def find_trend_lines(data, distance=5, prominence=None):
                        Adjust based on data frequency (e.g., more for 1m, less for 1h).
         prominence (float, optional): Minimum vertical distance (in price units) for a
                                    swing point to be considered significant. Filters noise.
+        timestamps (np.ndarray, optional): UTC seconds for each row of `data`, e.g. the
+                                   array the chart already holds. Derived once from the
+                                   index when omitted.
 
     Returns:
         list: A list of dictionaries, where each dictionary represents a trend line segment.
@@ -189,31 +179,37 @@ def find_trend_lines(data, distance=5, prominence=None):
         print("Invalid input: DataFrame index must be a DatetimeIndex.")
         return []
 
+    if timestamps is None:
+        timestamps = _index_to_utc_seconds(data.index)
+
     all_lines = []
 
     # --- Find Uptrend Lines (connecting lows) ---
-    # Find troughs by finding peaks in the *negative* low series
-    lows = data["Low"]
+    lows = data["Low"].to_numpy()
     swing_low_indices = _find_swing_points(
-        -lows, distance=distance, prominence=prominence
+        lows, distance=distance, prominence=prominence, mode="troughs"
     )
     # print(f"DEBUG: Found {len(swing_low_indices)} swing lows.")
     if len(swing_low_indices) > 1:
         uptrend_lines = _generate_trend_line_segments(
-            swing_low_indices, data, line_type="up"
+            swing_low_indices, data, line_type="up", timestamps=timestamps, prices=lows
         )
         all_lines.extend(uptrend_lines)
         # print(f"DEBUG: Generated {len(uptrend_lines)} uptrend segments.")
 
     # --- Find Downtrend Lines (connecting highs) ---
-    highs = data["High"]
+    highs = data["High"].to_numpy()
     swing_high_indices = _find_swing_points(
-        highs, distance=distance, prominence=prominence
+        highs, distance=distance, prominence=prominence, mode="peaks"
     )
     # print(f"DEBUG: Found {len(swing_high_indices)} swing highs.")
     if len(swing_high_indices) > 1:
         downtrend_lines = _generate_trend_line_segments(
-            swing_high_indices, data, line_type="down"
+            swing_high_indices,
+            data,
+            line_type="down",
+            timestamps=timestamps,
+            prices=highs,
         )
         all_lines.extend(downtrend_lines)
         # print(f"DEBUG: Generated {len(downtrend_lines)} downtrend segments.")